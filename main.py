@@ -8,6 +8,10 @@ import google.generativeai as genai
 import re
 import time
 import shutil
+import ast
+import sys
+import json
+import functools
 
 # .envファイルを最初に読み込む
 load_dotenv()
@@ -101,7 +105,9 @@ def parse_gemini_response(response_text):
 
     # requirements.txtのブロックを抽出
     requirements_match = re.search(r"```text\n(.*?)```", response_text, re.DOTALL)
-    requirements = requirements_match.group(1).strip() if requirements_match else "py-cord\npython-dotenv" # デフォルト値
+    model_requirements = requirements_match.group(1).strip() if requirements_match else ""
+    # モデルの出力は信用せず、コードのimportから依存関係を決定する
+    requirements = resolve_requirements(python_code, model_requirements)
 
     # .env.exampleのブロックを抽出
     env_example_match = re.search(r"```env\n(.*?)```", response_text, re.DOTALL)
@@ -112,6 +118,93 @@ def parse_gemini_response(response_text):
 
     return python_code, requirements, env_example, commands_list
 
+# import名 → 固定バージョンのディストリビューションの対応表
+PACKAGE_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "package_index.json")
+DEFAULT_REQUIREMENTS = "py-cord\npython-dotenv"
+# py-cordと同じ`discord`モジュールを提供するため、同時に入れてはいけないパッケージ
+CONFLICTING_REQUIREMENTS = {"discord", "discord-py"}
+
+@functools.lru_cache(maxsize=None)
+def load_package_index():
+    """同梱のimport→パッケージ対応表を初回呼び出し時に読み込む"""
+    with open(PACKAGE_INDEX_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def extract_imports(python_code):
+    """Pythonコードの構文木からimportされているモジュール名を抽出する"""
+    modules = set()
+    for node in ast.walk(ast.parse(python_code)):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules.add(node.module)
+            # from google import genai のような形式に対応する
+            modules.update(f"{node.module}.{alias.name}" for alias in node.names)
+    return modules
+
+def lookup_package(module_name, package_index):
+    """モジュール名の最長一致で対応表を引く（見つからなければNone）"""
+    parts = module_name.split(".")
+    for i in range(len(parts), 0, -1):
+        key = ".".join(parts[:i])
+        if key in package_index:
+            return key
+    return None
+
+def requirement_name(line):
+    """requirements.txtの1行から正規化したパッケージ名を取り出す"""
+    name = re.split(r"[\s;<>=!~\[]", line.strip(), maxsplit=1)[0]
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def resolve_requirements(python_code, model_requirements=""):
+    """コードのimportからrequirements.txtの内容を決定する"""
+    try:
+        modules = extract_imports(python_code)
+    except SyntaxError as e:
+        print(f"importの解析に失敗したため、モデルのrequirementsを使用します: {e}")
+        return model_requirements or DEFAULT_REQUIREMENTS
+
+    package_index = load_package_index()
+    resolved_keys = set()
+    unknown = set()
+    for module_name in modules:
+        top_level = module_name.split(".")[0]
+        if top_level in sys.stdlib_module_names:
+            continue
+        key = lookup_package(module_name, package_index)
+        if key:
+            resolved_keys.add(key)
+        elif any(other.startswith(module_name + ".") for other in modules):
+            # google のような親パッケージは、より詳細なimport側で判定する
+            continue
+        elif any(k.startswith(top_level + ".") for k in package_index):
+            unknown.add(module_name)
+        else:
+            unknown.add(top_level)
+
+    # ボットの実行に必須のパッケージは常に含める
+    resolved_keys.update(["discord", "dotenv"])
+
+    requirements = []
+    for key in sorted(resolved_keys):
+        for line in package_index[key]:
+            if line not in requirements:
+                requirements.append(line)
+
+    if unknown:
+        print(f"対応表にないimportがあります: {', '.join(sorted(unknown))}")
+        # 対応表にないものだけ、モデルが記載した行で補う
+        known_names = {requirement_name(line) for lines in package_index.values() for line in lines}
+        known_names |= CONFLICTING_REQUIREMENTS
+        for line in model_requirements.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if requirement_name(line) not in known_names and line not in requirements:
+                requirements.append(line)
+
+    return "\n".join(requirements)
+
 def extract_commands_from_code(python_code):
     """Pythonコードからコマンド一覧を抽出する"""
     commands = []